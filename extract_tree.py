@@ -1,18 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import orjson
 import sys
 
 def extract_tree(nodes, indent=0):
     """
-    递归提取 nodeName 和 relateDocument，并按树形结构展示
+    提取 nodeName 和 relateDocument，并按树形结构展示
+    使用显式栈按先序遍历，避免深层目录树触发递归深度限制
     """
     if not nodes:
         return
     
-    for node in nodes:
-        prefix = "  " * indent + "├─ " if indent > 0 else ""
+    stack = [(node, indent) for node in reversed(nodes)]
+    
+    while stack:
+        node, level = stack.pop()
+        prefix = "  " * level + "├─ " if level > 0 else ""
         
         node_name = node.get("nodeName", "N/A")
         relate_doc = node.get("relateDocument", "")
@@ -23,20 +27,19 @@ def extract_tree(nodes, indent=0):
         else:
             print(f"{prefix}{node_name}")
         
-        # 递归处理子节点
-        children = node.get("children", [])
-        if children:
-            extract_tree(children, indent + 1)
+        # 子节点逆序入栈，保证按原顺序输出
+        for child in reversed(node.get("children") or ()):
+            stack.append((child, level + 1))
 
 def main():
     # 读取 category.json 文件
     try:
-        with open("category.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open("category.json", "rb") as f:
+            data = orjson.loads(f.read())
     except FileNotFoundError:
         print("错误：找不到 category.json 文件")
         sys.exit(1)
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print("错误：JSON 文件格式不正确")
         sys.exit(1)
     
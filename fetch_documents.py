@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import logging
+import os
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-from typing import List, Dict, Optional
-from pathlib import Path
+from typing import Dict, Optional
+from main import (
+    MAX_RETRIES, RETRY_STATUS_CODES, RateLimiter, _backoff_delay, count_docs, iter_docs
+)
+from html_to_markdown import save_json
+
+logger = logging.getLogger(__name__)
 
 # API 配置
 API_URL = "https://svc-drcn.developer.huawei.com/community/servlet/consumer/cn/documentPortal/getDocumentById"
@@ -13,42 +22,33 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
 
-# 请求延迟（秒）
-REQUEST_DELAY = 0.5
-
-
-def extract_doc_ids(data: List[Dict]) -> List[Dict]:
-    """
-    从 category.json 递归提取所有文档信息
-    返回包含 nodeName, relateDocument, relateDocId 的列表
-    """
-    docs = []
-    
-    def traverse(nodes):
-        for node in nodes:
-            if node.get("nodeName") and node.get("relateDocId"):
-                docs.append({
-                    "nodeName": node.get("nodeName"),
-                    "relateDocument": node.get("relateDocument", ""),
-                    "relateDocId": node.get("relateDocId"),
-                    "nodeId": node.get("nodeId", "")
-                })
-            
-            children = node.get("children", [])
-            if children:
-                traverse(children)
-    
-    traverse(data)
-    return docs
+# 复用连接的会话（keep-alive），连接失败时自动重试
+# 429/5xx 不在适配器内重试，交给 fetch_document 以便限速器感知限流
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        allowed_methods=["POST"]  # 查询接口，POST 可安全重试
+    )
+))
 
 
-def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides") -> Optional[Dict]:
+def fetch_document(
+    object_id: str,
+    catalog_name: str = "harmonyos-guides",
+    limiter: Optional[RateLimiter] = None
+) -> Optional[Dict]:
     """
     获取单个文档的详细信息
     
     Args:
         object_id: 对象 ID（来自 relateDocument）
         catalog_name: 目录名称，默认为 "harmonyos-guides"
+        limiter: 限速器，为 None 时不限速
     """
     try:
         payload = {
@@ -57,15 +57,26 @@ def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides") -> Op
             "catalogName": catalog_name,
             "language": "cn"
         }
-        response = requests.post(
-            API_URL,
-            json=payload,
-            headers=HEADERS,
-            timeout=10
-        )
-        response.raise_for_status()
+        for attempt in range(MAX_RETRIES + 1):
+            if limiter is not None:
+                time.sleep(limiter.reserve())
+            response = SESSION.post(
+                API_URL,
+                json=payload,
+                timeout=10
+            )
+            retry_after = None
+            if limiter is not None:
+                retry_after = limiter.update(response.status_code, response.headers)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                response.raise_for_status()
+                break
+            
+            # 限流或服务端错误：退避后重试
+            time.sleep(_backoff_delay(attempt, retry_after))
         
-        result = response.json()
+        # 直接解析原始字节，省去一次解码
+        result = orjson.loads(response.content)
         
         if result.get("code") == 0 and result.get("value"):
             value = result["value"]
@@ -77,14 +88,14 @@ def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides") -> Op
                 "content": value.get("content", {})
             }
         else:
-            print(f"[错误] 文档 {object_id}: {result.get('message', '未知错误')}")
+            logger.error("文档 %s: %s", object_id, result.get("message", "未知错误"))
             return None
             
     except requests.exceptions.RequestException as e:
-        print(f"[错误] 请求失败 {object_id}: {str(e)}")
+        logger.error("请求失败 %s: %s", object_id, e)
         return None
-    except json.JSONDecodeError:
-        print(f"[错误] JSON 解析失败 {doc_id}")
+    except orjson.JSONDecodeError:
+        logger.error("JSON 解析失败 %s", object_id)
         return None
 
 
@@ -96,69 +107,74 @@ def main():
     
     # 读取 category.json
     try:
-        with open("category.json", "r", encoding="utf-8") as f:
-            category_data = json.load(f)
+        with open("category.json", "rb") as f:
+            category_data = orjson.loads(f.read())
     except FileNotFoundError:
-        print("错误：找不到 category.json 文件")
+        logger.error("找不到 category.json 文件")
         return
-    except json.JSONDecodeError:
-        print("错误：category.json 文件格式不正确")
+    except orjson.JSONDecodeError:
+        logger.error("category.json 文件格式不正确")
         return
     
-    # 提取文档 ID
-    docs = extract_doc_ids(category_data)
-    print(f"[提取] 找到 {len(docs)} 个文档")
+    # 统计文档数量
+    total_count = count_docs(category_data)
+    print(f"[提取] 找到 {total_count} 个文档")
     print()
     
     # 爬取文档
     documents = []
-    for i, doc in enumerate(docs, 1):
+    limiter = RateLimiter()
+    for i, doc in enumerate(iter_docs(category_data), 1):
         object_id = doc["relateDocument"]
         node_name = doc["nodeName"]
         
-        print(f"[{i}/{len(docs)}] 爬取: {node_name} ({object_id})")
+        print(f"[{i}/{total_count}] 爬取: {node_name} ({object_id})")
         
-        doc_info = fetch_document(object_id)
+        doc_info = fetch_document(object_id, limiter=limiter)
         if doc_info:
             # 添加原始信息
             doc_info.update({
                 "nodeName": node_name,
                 "relateDocument": doc["relateDocument"],
-                "nodeId": doc["nodeId"]
+                "nodeId": doc["nodeId"],
+                "path": doc["path"],
+                "isLeaf": doc["isLeaf"]
             })
             documents.append(doc_info)
-        
-        # 延迟请求
-        time.sleep(REQUEST_DELAY)
+    
+    SESSION.close()
     
     print()
-    print(f"[完成] 成功爬取 {len(documents)}/{len(docs)} 个文档")
+    print(f"[完成] 成功爬取 {len(documents)}/{total_count} 个文档")
     print()
     
     # 保存结果
     output_file = "documents.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(documents, f, ensure_ascii=False, indent=2)
+    save_json(output_file, documents)
     
     print(f"[保存] 结果已保存到 {output_file}")
     
     # 生成摘要
     summary_file = "documents_summary.json"
-    summary = []
-    for doc in documents:
-        summary.append({
+    summary = [
+        {
             "nodeName": doc.get("nodeName"),
             "title": doc.get("title"),
             "fileName": doc.get("fileName"),
-            "anchorCount": len(doc.get("anchorList", [])),
-            "anchors": [a.get("title") for a in doc.get("anchorList", [])]
-        })
+            "anchorCount": len(anchors := doc.get("anchorList") or []),
+            "anchors": [a.get("title") for a in anchors]
+        }
+        for doc in documents
+    ]
     
-    with open(summary_file, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    save_json(summary_file, summary)
     
     print(f"[保存] 摘要已保存到 {summary_file}")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.environ.get("LOGLEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
     main()
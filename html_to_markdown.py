@@ -3,18 +3,79 @@
 
 """
 HTML 转 Markdown 转换模块
-使用 html2text 库进行专业的转换
+使用 selectolax（lexbor 引擎）解析 HTML 并直接生成 Markdown，
+解析失败时回退到 html2text
 """
 
-import json
+import logging
+import orjson
+import os
+import re
 import html2text
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+logger = logging.getLogger(__name__)
+
+# 超过 2 个连续空行
+_BLANKLINE_RE = re.compile(r'\n\s*\n\s*\n+')
+
+# html2text 转换选项
+_CONVERTER_OPTIONS = {
+    "ignore_links": False,  # 保留链接
+    "ignore_images": False,  # 保留图片
+    "ignore_emphasis": False,  # 保留强调（粗体、斜体）
+    "body_width": 0,  # 不自动换行
+    "unicode_snob": True,  # 使用 Unicode 字符
+    "skip_internal_links": True,  # 跳过内部锚点链接
+    "ignore_anchors": True,  # 忽略 <a name> 标签
+    "protect_links": True,  # 保护链接不被转义
+    "wrap_links": False,  # 不换行链接
+}
+
+# 连续空白字符
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 连续空格
+_SPACES_RE = re.compile(r' {2,}')
+
+# 行首会被识别为块级标记的文本（有序列表、无序列表、标题、引用、分隔线），需要转义
+_ORDERED_MARKER_RE = re.compile(r'^(\d+)([.)])(?=\s|$)')
+_BLOCK_MARKER_RE = re.compile(r'^(#{1,6}(?=\s|$)|[-+*](?=\s|$)|-(?=-)|>)')
+
+# 按块级元素处理的标签
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl",
+    "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2",
+    "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p",
+    "pre", "section", "summary", "table", "ul",
+}
+
+# 忽略的标签（连同其内容）
+_SKIP_TAGS = {"head", "link", "meta", "noscript", "script", "style", "template", "title"}
+
+# 并行转换时每批提交给子进程的文档数，用于摊薄进程间通信开销
+CONVERT_CHUNKSIZE = 16
+
+
+def _new_converter() -> html2text.HTML2Text:
+    """
+    创建已配置的 html2text 转换器
+    
+    HTML2Text 会在多次 handle() 之间保留解析状态（未闭合的列表、pre、
+    引用块等），因此每个文档使用新实例；创建开销远小于转换本身
+    """
+    h = html2text.HTML2Text()
+    for name, value in _CONVERTER_OPTIONS.items():
+        setattr(h, name, value)
+    return h
 
 
 def html_to_markdown(html_content: str) -> str:
     """
     将 HTML 内容转换为 Markdown
-    使用 html2text 库进行转换
+    优先使用 html_to_markdown_fast，解析失败时回退到 html2text
     
     Args:
         html_content: HTML 字符串
@@ -25,45 +86,374 @@ def html_to_markdown(html_content: str) -> str:
     if not html_content:
         return ""
     
+    # 空白内容（目录/索引节点常见）无需解析
+    stripped = html_content.strip()
+    if not stripped:
+        return ""
+    
+    # 不含标签和实体的纯文本：与解析后的结果一致，只需合并空白
+    if "<" not in stripped and "&" not in stripped:
+        return _escape_line_start(_WHITESPACE_RE.sub(" ", stripped))
+    
+    try:
+        return html_to_markdown_fast(html_content)
+    except Exception as e:
+        logger.warning("快速转换失败，回退到 html2text: %s", e)
+    
     try:
-        # 创建转换器实例
-        h = html2text.HTML2Text()
-        
-        # 配置转换选项
-        h.ignore_links = False  # 保留链接
-        h.ignore_images = False  # 保留图片
-        h.ignore_emphasis = False  # 保留强调（粗体、斜体）
-        h.body_width = 0  # 不自动换行
-        h.unicode_snob = True  # 使用 Unicode 字符
-        h.skip_internal_links = True  # 跳过内部锚点链接
-        h.ignore_anchors = True  # 忽略 <a name> 标签
-        h.protect_links = True  # 保护链接不被转义
-        h.wrap_links = False  # 不换行链接
-        
         # 转换
-        markdown = h.handle(html_content)
+        markdown = _new_converter().handle(html_content)
         
         # 清理多余的空行（超过 2 个连续空行合并为 2 个）
-        import re
-        markdown = re.sub(r'\n\s*\n\s*\n+', '\n\n', markdown)
+        markdown = _BLANKLINE_RE.sub('\n\n', markdown)
         
         return markdown.strip()
         
     except Exception as e:
-        print(f"[警告] HTML 转换失败: {str(e)}")
+        logger.warning("HTML 转换失败: %s", e)
         return html_content
 
 
+def html_to_markdown_fast(html_content: str) -> str:
+    """
+    使用 selectolax 解析 HTML 并直接生成 Markdown
+    
+    支持标题、段落、列表（含嵌套）、代码块、引用、表格、链接、图片
+    以及粗体/斜体/行内代码
+    
+    Args:
+        html_content: HTML 字符串
+    
+    Returns:
+        Markdown 字符串
+    """
+    body = LexborHTMLParser(html_content).body
+    if body is None:
+        return ""
+    markdown = _render_blocks(body)
+    return _BLANKLINE_RE.sub('\n\n', markdown).strip()
+
+
+def _render_blocks(node: LexborNode, tight: bool = False) -> str:
+    """
+    渲染节点的子节点：连续的行内内容合并为段落，块级元素各自成段
+    
+    Args:
+        node: 父节点
+        tight: 是否紧凑排列（列表项中的子列表紧跟文本，不空行）
+    """
+    blocks: List[str] = []
+    inline: List[str] = []
+    
+    def flush_inline():
+        if inline:
+            paragraph = _join_inline(inline)
+            if paragraph:
+                blocks.append(paragraph)
+            inline.clear()
+    
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == "-text":
+            inline.append(_WHITESPACE_RE.sub(" ", child.text(deep=False)))
+        elif tag in _BLOCK_TAGS:
+            flush_inline()
+            block = _render_block(child)
+            if block:
+                if tight and tag in ("ul", "ol") and blocks:
+                    blocks[-1] += "\n" + block
+                else:
+                    blocks.append(block)
+        elif tag not in _SKIP_TAGS and not tag.startswith("-"):
+            inline.append(_render_inline(child))
+    flush_inline()
+    
+    return "\n\n".join(blocks)
+
+
+def _render_block(node: LexborNode) -> str:
+    """
+    渲染单个块级元素
+    """
+    tag = node.tag
+    
+    if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+        text = _join_inline([_render_inline(node)]).replace("  \n", " ")
+        return "#" * int(tag[1]) + " " + text if text else ""
+    
+    if tag in ("ul", "ol"):
+        return _render_list(node)
+    
+    if tag == "li":
+        return _prefix_lines(_render_blocks(node, tight=True), "- ", "  ")
+    
+    if tag == "pre":
+        return _render_pre(node)
+    
+    if tag == "blockquote":
+        inner = _render_blocks(node)
+        return "\n".join(f"> {line}" if line else ">" for line in inner.split("\n")) if inner else ""
+    
+    if tag == "hr":
+        return "---"
+    
+    if tag == "table":
+        return _render_table(node)
+    
+    return _render_blocks(node)
+
+
+def _render_inline(node: LexborNode) -> str:
+    """
+    渲染行内元素（包括其子节点）
+    """
+    tag = node.tag
+    
+    if tag == "br":
+        return "\n"
+    
+    if tag == "img":
+        src = node.attributes.get("src") or ""
+        alt = node.attributes.get("alt") or ""
+        return f"![{alt}]({_format_url(src)})" if src else ""
+    
+    if tag == "code":
+        code = _WHITESPACE_RE.sub(" ", node.text(deep=True))
+        if not code.strip():
+            return code
+        fence = "``" if "`" in code else "`"
+        return f"{fence}{code}{fence}" if fence == "`" else f"{fence} {code} {fence}"
+    
+    parts: List[str] = []
+    for child in node.iter(include_text=True):
+        child_tag = child.tag
+        if child_tag == "-text":
+            parts.append(_WHITESPACE_RE.sub(" ", child.text(deep=False)))
+        elif child_tag not in _SKIP_TAGS and not child_tag.startswith("-"):
+            parts.append(_render_inline(child))
+    text = "".join(parts)
+    
+    if tag in ("strong", "b"):
+        return _wrap(text, "**")
+    
+    if tag in ("em", "i"):
+        return _wrap(text, "_")
+    
+    if tag == "a":
+        href = node.attributes.get("href") or ""
+        label = text.strip()
+        # 跳过内部锚点链接和没有文本的链接
+        if not href or href.startswith("#") or not label:
+            return text
+        return f"[{label}]({_format_url(href)})"
+    
+    return text
+
+
+def _render_list(node: LexborNode) -> str:
+    """
+    渲染有序/无序列表，嵌套列表按标记宽度缩进
+    """
+    ordered = node.tag == "ol"
+    try:
+        number = int(node.attributes.get("start") or 1)
+    except ValueError:
+        number = 1
+    
+    items: List[str] = []
+    for child in node.iter():
+        if child.tag == "li":
+            marker = f"{number}. " if ordered else "- "
+            number += 1
+            items.append(_prefix_lines(_render_blocks(child, tight=True), marker, " " * len(marker)))
+        elif child.tag in ("ul", "ol") and items:
+            # 不规范的嵌套：子列表直接位于 ul/ol 下，挂到上一个列表项
+            items[-1] += "\n" + _prefix_lines(_render_list(child), "  ", "  ")
+    
+    return "\n".join(items)
+
+
+def _render_pre(node: LexborNode) -> str:
+    """
+    渲染代码块为围栏代码块，保留原始空白
+    """
+    code = _pre_text(node).strip("\n")
+    
+    language = ""
+    for candidate in (node, node.css_first("code")):
+        if candidate is None:
+            continue
+        for cls in (candidate.attributes.get("class") or "").split():
+            if cls.startswith("language-"):
+                language = cls[len("language-"):]
+                break
+        if language:
+            break
+    
+    fence = "```"
+    while fence in code:
+        fence += "`"
+    return f"{fence}{language}\n{code}\n{fence}"
+
+
+def _pre_text(node: LexborNode) -> str:
+    """
+    提取代码块的原始文本，<br> 转为换行
+    """
+    parts: List[str] = []
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == "-text":
+            parts.append(child.text(deep=False))
+        elif tag == "br":
+            parts.append("\n")
+        elif tag not in _SKIP_TAGS and not tag.startswith("-"):
+            parts.append(_pre_text(child))
+    return "".join(parts)
+
+
+def _render_table(node: LexborNode) -> str:
+    """
+    渲染表格为 GFM 表格，第一行作为表头
+    """
+    rows: List[List[str]] = []
+    for row in node.css("tr"):
+        # 忽略嵌套表格中的行
+        parent = row.parent
+        while parent is not None and parent.tag != "table":
+            parent = parent.parent
+        if parent is not None and parent.mem_id != node.mem_id:
+            continue
+        
+        cells = []
+        for cell in row.iter():
+            if cell.tag in ("th", "td"):
+                text = _render_blocks(cell)
+                text = _WHITESPACE_RE.sub(" ", text.replace("\n", " ")).strip()
+                cells.append(text.replace("|", "\\|"))
+        if cells:
+            rows.append(cells)
+    
+    if not rows:
+        return ""
+    
+    width = max(len(cells) for cells in rows)
+    lines: List[str] = []
+    for i, cells in enumerate(rows):
+        cells = cells + [""] * (width - len(cells))
+        lines.append("| " + " | ".join(cells) + " |")
+        if i == 0:
+            lines.append("|" + " --- |" * width)
+    return "\n".join(lines)
+
+
+def _join_inline(parts: List[str]) -> str:
+    """
+    合并行内片段：合并多余空格并去除每行首尾空白，转义行首的块级标记，
+    <br> 转为 Markdown 硬换行
+    """
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in "".join(parts).split("\n")]
+    return "  \n".join(_escape_line_start(line) for line in lines if line)
+
+
+def _escape_line_start(line: str) -> str:
+    """
+    转义行首的块级 Markdown 标记，避免普通文本被渲染为列表、标题或引用
+    """
+    line = _ORDERED_MARKER_RE.sub(r'\1\\\2', line)
+    return _BLOCK_MARKER_RE.sub(r'\\\1', line)
+
+
+def _prefix_lines(text: str, first: str, rest: str) -> str:
+    """
+    为多行文本添加前缀：首行使用 first，其余非空行使用 rest
+    """
+    lines = text.split("\n")
+    return "\n".join(
+        [first + lines[0]] + [rest + line if line else line for line in lines[1:]]
+    )
+
+
+def _wrap(text: str, mark: str) -> str:
+    """
+    用强调标记包裹文本，首尾空白保留在标记外侧
+    """
+    stripped = text.strip()
+    if not stripped:
+        return text
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()):]
+    return f"{leading}{mark}{stripped}{mark}{trailing}"
+
+
+def _format_url(url: str) -> str:
+    """
+    含空白或括号的 URL 用尖括号包裹
+    """
+    if any(c in url for c in " ()"):
+        return f"<{url}>"
+    return url
+
+
+def load_documents(documents_file: str) -> List[Dict]:
+    """
+    读取文档数据，支持 JSON Lines（.jsonl）和旧版 JSON 数组格式
+    
+    Args:
+        documents_file: 文档文件路径
+    
+    Returns:
+        文档列表
+    """
+    with open(documents_file, "rb") as f:
+        if not documents_file.endswith(".jsonl"):
+            return orjson.loads(f.read())
+        
+        documents = []
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                documents.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # 爬取中断时可能留下不完整的行，跳过而不是放弃整个文件
+                logger.warning("跳过格式不正确的行 %s:%s", documents_file, line_no)
+        return documents
+
+
+def save_json(output_file: str, data) -> None:
+    """
+    以缩进 JSON 格式原子写入文件
+    先完整写入同目录下的临时文件，再用 os.replace 替换目标文件，
+    中途中断不会截断已有的文件
+    
+    Args:
+        output_file: 输出文件路径
+        data: 要序列化的数据
+    """
+    tmp_file = output_file + ".tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
 def process_documents_to_markdown(
-    documents_file: str = "documents.json",
-    output_file: str = "documents_markdown.json"
+    documents_file: str = "documents.jsonl",
+    output_file: str = "documents_markdown.json",
+    max_workers: Optional[int] = None
 ) -> Dict[str, any]:
     """
-    将 documents.json 中的 HTML 内容转换为 Markdown
+    将文档文件中的 HTML 内容转换为 Markdown
     
     Args:
-        documents_file: 输入的 documents.json 文件路径
+        documents_file: 输入的文档文件路径（.jsonl 或 .json）
         output_file: 输出的 Markdown 格式文件路径
+        max_workers: 转换进程数，默认为 CPU 核数
     
     Returns:
         转换结果统计
@@ -75,66 +465,62 @@ def process_documents_to_markdown(
     
     # 读取文档
     try:
-        with open(documents_file, "r", encoding="utf-8") as f:
-            documents = json.load(f)
+        documents = load_documents(documents_file)
     except FileNotFoundError:
-        print(f"错误：找不到 {documents_file} 文件")
+        logger.error("找不到 %s 文件", documents_file)
         return {"success": False, "error": "File not found"}
-    except json.JSONDecodeError:
-        print(f"错误：{documents_file} 文件格式不正确")
+    except orjson.JSONDecodeError:
+        logger.error("%s 文件格式不正确", documents_file)
         return {"success": False, "error": "Invalid JSON"}
     
     print(f"[读取] 读取 {len(documents)} 个文档")
     print()
     
-    # 转换文档
-    converted_documents = []
-    for i, doc in enumerate(documents, 1):
-        print(f"[{i}/{len(documents)}] 转换: {doc.get('nodeName', 'Unknown')}")
-        
-        # 转换 content 中的 HTML
-        if doc.get("content") and doc["content"].get("content"):
-            html_content = doc["content"]["content"]
-            markdown_content = html_to_markdown(html_content)
-            
+    # 转换 content 中的 HTML（多进程并行）
+    to_convert = [
+        doc for doc in documents
+        if doc.get("content") and doc["content"].get("content")
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        html_contents = (doc["content"]["content"] for doc in to_convert)
+        results = pool.map(html_to_markdown, html_contents, chunksize=CONVERT_CHUNKSIZE)
+        for i, (doc, markdown_content) in enumerate(zip(to_convert, results), 1):
+            print(f"[{i}/{len(to_convert)}] 转换: {doc.get('nodeName', 'Unknown')}")
             doc["content"]["markdown"] = markdown_content
-        
-        converted_documents.append(doc)
     
     print()
     print(f"[完成] 转换完成")
     print()
     
     # 保存转换后的文档
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(converted_documents, f, ensure_ascii=False, indent=2)
+    save_json(output_file, documents)
     
     print(f"[保存] 结果已保存到 {output_file}")
     
     return {
         "success": True,
         "total": len(documents),
-        "converted": len(converted_documents),
+        "converted": len(to_convert),
         "output_file": output_file
     }
 
 
 def create_markdown_files(
-    documents_file: str = "documents.json",
-    output_dir: str = "markdown_docs"
+    documents_file: str = "documents.jsonl",
+    output_dir: str = "markdown_docs",
+    max_workers: Optional[int] = None
 ) -> Dict[str, any]:
     """
     为每个文档创建独立的 Markdown 文件
     
     Args:
-        documents_file: 输入的 documents.json 文件路径
+        documents_file: 输入的文档文件路径（.jsonl 或 .json）
         output_dir: 输出目录
+        max_workers: 转换进程数，默认为 CPU 核数
     
     Returns:
         创建结果统计
     """
-    import os
-    
     print("=" * 80)
     print("生成独立 Markdown 文件")
     print("=" * 80)
@@ -145,13 +531,12 @@ def create_markdown_files(
     
     # 读取文档
     try:
-        with open(documents_file, "r", encoding="utf-8") as f:
-            documents = json.load(f)
+        documents = load_documents(documents_file)
     except FileNotFoundError:
-        print(f"错误：找不到 {documents_file} 文件")
+        logger.error("找不到 %s 文件", documents_file)
         return {"success": False, "error": "File not found"}
-    except json.JSONDecodeError:
-        print(f"错误：{documents_file} 文件格式不正确")
+    except orjson.JSONDecodeError:
+        logger.error("%s 文件格式不正确", documents_file)
         return {"success": False, "error": "Invalid JSON"}
     
     print(f"[读取] 读取 {len(documents)} 个文档")
@@ -165,12 +550,16 @@ def create_markdown_files(
     
     if need_convert:
         print("[转换] 文档尚未转换，正在进行 HTML 转 Markdown...")
-        for doc in documents:
-            if doc.get("content") and doc["content"].get("content"):
-                if not doc["content"].get("markdown"):
-                    html_content = doc["content"]["content"]
-                    markdown_content = html_to_markdown(html_content)
-                    doc["content"]["markdown"] = markdown_content
+        to_convert = [
+            doc for doc in documents
+            if doc.get("content") and doc["content"].get("content")
+            and not doc["content"].get("markdown")
+        ]
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            html_contents = (doc["content"]["content"] for doc in to_convert)
+            results = pool.map(html_to_markdown, html_contents, chunksize=CONVERT_CHUNKSIZE)
+            for doc, markdown_content in zip(to_convert, results):
+                doc["content"]["markdown"] = markdown_content
         print()
     
     # 生成 Markdown 文件
@@ -180,23 +569,24 @@ def create_markdown_files(
         file_path = os.path.join(output_dir, f"{file_name}.md")
         
         # 构建 Markdown 内容
-        markdown_content = f"""# {doc.get('title', 'Untitled')}
-
-**来源**: {doc.get('nodeName', 'Unknown')}
-
-"""
+        parts = [
+            f"# {doc.get('title', 'Untitled')}\n\n",
+            f"**来源**: {doc.get('nodeName', 'Unknown')}\n\n"
+        ]
         
         # 添加锚点列表
         if doc.get("anchorList"):
-            markdown_content += "## 目录\n\n"
+            parts.append("## 目录\n\n")
             for anchor in doc["anchorList"]:
-                markdown_content += f"- {anchor.get('title', 'Unknown')}\n"
-            markdown_content += "\n"
+                parts.append(f"- {anchor.get('title', 'Unknown')}\n")
+            parts.append("\n")
         
         # 添加内容
         if doc.get("content") and doc["content"].get("markdown"):
-            markdown_content += "## 内容\n\n"
-            markdown_content += doc["content"]["markdown"]
+            parts.append("## 内容\n\n")
+            parts.append(doc["content"]["markdown"])
+        
+        markdown_content = "".join(parts)
         
         # 写入文件
         try:
@@ -205,7 +595,7 @@ def create_markdown_files(
             print(f"[{i}/{len(documents)}] 生成: {file_name}.md")
             created_count += 1
         except Exception as e:
-            print(f"[错误] 生成失败 {file_name}: {str(e)}")
+            logger.error("生成失败 %s: %s", file_name, e)
     
     print()
     print(f"[完成] 成功生成 {created_count}/{len(documents)} 个 Markdown 文件")
@@ -220,9 +610,14 @@ def create_markdown_files(
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.environ.get("LOGLEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    
     # 转换为 Markdown 并保存到 JSON
     result1 = process_documents_to_markdown(
-        documents_file="documents.json",
+        documents_file="documents.jsonl",
         output_file="documents_markdown.json"
     )
     print()
@@ -230,6 +625,6 @@ if __name__ == "__main__":
     
     # 生成独立的 Markdown 文件
     result2 = create_markdown_files(
-        documents_file="documents.json",
+        documents_file="documents.jsonl",
         output_dir="markdown_docs"
     )
@@ -6,14 +6,25 @@ OpenHarmony 文档爬虫完整流程
 集成：爬取 -> HTML转Markdown -> 按树形结构保存到本地
 """
 
-import json
-import requests
-import time
+import asyncio
+import hashlib
+import logging
+import aiohttp
+import orjson
+import zstandard
 import sys
 import os
 import re
-from typing import List, Dict, Optional
-from html_to_markdown import html_to_markdown
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Dict, Optional
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+from html_to_markdown import html_to_markdown, save_json
+
+logger = logging.getLogger(__name__)
 
 # API 配置
 API_URL = "https://svc-drcn.developer.huawei.com/community/servlet/consumer/cn/documentPortal/getDocumentById"
@@ -21,25 +32,152 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
 
-# 请求延迟（秒）
-REQUEST_DELAY = 0.5
+# 并发配置
+MAX_CONCURRENCY = 32  # 同时进行的请求数
+CONNECTION_LIMIT_PER_HOST = 64  # 单个主机的连接池大小
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# 限速与重试配置
+REQUEST_RATE = 10.0  # 初始每秒请求数，会根据服务端响应自适应调整
+MIN_REQUEST_RATE = 0.5  # 速率下限
+MAX_RETRIES = 3  # 429/5xx 及连接错误的最大重试次数
+RETRY_BACKOFF_BASE = 1.0  # 指数退避基数（秒）
+RETRY_BACKOFF_MAX = 60.0  # 单次退避上限（秒）
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
 # 输出目录
 DOCS_DIR = "docs"
 
+# API 响应缓存目录（zstd 压缩的原始响应），重新生成 Markdown 时无需再次请求
+CACHE_DIR = ".cache/api"
+CACHE_ZSTD_LEVEL = 3
+
+# Markdown 文件头模板
+_HEADER_TPL = "# {title}\n\n**来源**: {source}  \n**文件名**: {fname}\n\n"
 
-def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides", language: str = "cn") -> Optional[Dict]:
+# 已创建的目录，避免重复调用 os.makedirs
+_CREATED_DIRS: set[str] = set()
+
+# 文件名清理规则
+_BAD_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_WS_RE = re.compile(r'\s+')
+
+
+class RateLimiter:
+    """
+    令牌桶限速器
+    按 rate_per_sec 均匀分配请求时间槽，并根据服务端返回的
+    Retry-After / X-RateLimit-Remaining 响应头自适应调整速率
+    """
+    
+    def __init__(self, rate_per_sec: float = REQUEST_RATE, min_rate: float = MIN_REQUEST_RATE):
+        self.rate_per_sec = rate_per_sec
+        self.max_rate = rate_per_sec
+        self.min_rate = min_rate
+        self.last_request_time = time.monotonic() - 1 / rate_per_sec
+    
+    def reserve(self) -> float:
+        """
+        预约下一个请求时间槽，返回需要等待的秒数
+        """
+        now = time.monotonic()
+        slot = max(now, self.last_request_time + 1 / self.rate_per_sec)
+        self.last_request_time = slot
+        return slot - now
+    
+    async def await_slot(self) -> None:
+        """
+        等待直到可以发出下一个请求
+        
+        每次醒来都按当前的 rate_per_sec / last_request_time 重新计算时间槽，
+        因此等待期间发生的降速或 Retry-After 也会推迟已在排队的请求
+        """
+        while True:
+            now = time.monotonic()
+            slot = self.last_request_time + 1 / self.rate_per_sec
+            if slot <= now:
+                self.last_request_time = now
+                return
+            await asyncio.sleep(slot - now)
+    
+    def update(self, status: int, headers) -> Optional[float]:
+        """
+        根据响应状态和响应头调整速率
+        
+        Args:
+            status: HTTP 状态码
+            headers: 响应头
+        
+        Returns:
+            服务端要求等待的秒数（Retry-After），没有则返回 None
+        """
+        retry_after = _parse_retry_after(headers.get("Retry-After"))
+        remaining = headers.get("X-RateLimit-Remaining")
+        
+        if status == 429 or (remaining is not None and remaining.strip() == "0"):
+            # 触发限流：速率减半
+            self.rate_per_sec = max(self.min_rate, self.rate_per_sec / 2)
+        elif status < 400:
+            # 请求正常：逐步恢复速率
+            self.rate_per_sec = min(self.max_rate, self.rate_per_sec * 1.1)
+        
+        if retry_after:
+            # 在服务端要求的时间之前不再发出请求
+            self.last_request_time = max(self.last_request_time, time.monotonic() + retry_after)
+        return retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（秒数或 HTTP 日期）
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    计算第 attempt 次重试前的等待时间（指数退避，不少于 Retry-After）
+    """
+    backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt)
+    return max(backoff, retry_after or 0.0)
+
+
+async def fetch_document(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    object_id: str,
+    catalog_name: str = "harmonyos-guides",
+    language: str = "cn",
+    limiter: Optional[RateLimiter] = None,
+    cache_dir: Optional[str] = None,
+    refresh: bool = False
+) -> Optional[Dict]:
     """
     获取单个文档的详细信息
     
     Args:
+        session: 复用的 aiohttp 会话
+        sem: 限制并发请求数的信号量
         object_id: 对象 ID（来自 relateDocument）
         catalog_name: 目录名称，默认为 "harmonyos-guides"
         language: 语言，默认为 "cn"
+        limiter: 限速器，为 None 时不限速
+        cache_dir: 响应缓存目录，命中时直接读取本地缓存；为 None 时不使用缓存
+        refresh: 为 True 时忽略已有缓存重新请求，成功后覆盖缓存
     
     Returns:
         包含文档信息的字典，如果请求失败返回 None
     """
+    cache_path = _cache_path(cache_dir, object_id, catalog_name, language) if cache_dir else None
     try:
         payload = {
             "objectId": object_id,
@@ -47,17 +185,40 @@ def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides", langu
             "catalogName": catalog_name,
             "language": language
         }
-        response = requests.post(
-            API_URL,
-            json=payload,
-            headers=HEADERS,
-            timeout=10
-        )
-        response.raise_for_status()
+        raw = _read_cache(cache_path) if cache_path is not None and not refresh else None
+        cached = raw is not None
+        
+        for attempt in range(0 if cached else MAX_RETRIES + 1):
+            retry_after = None
+            async with sem:
+                # 在信号量内等待时间槽，限制同时轮询限速器的协程数量
+                if limiter is not None:
+                    await limiter.await_slot()
+                try:
+                    async with session.post(
+                        API_URL,
+                        json=payload,
+                        headers=HEADERS,
+                        timeout=REQUEST_TIMEOUT
+                    ) as response:
+                        if limiter is not None:
+                            retry_after = limiter.update(response.status, response.headers)
+                        if response.status not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                            response.raise_for_status()
+                            raw = await response.read()
+                            break
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt == MAX_RETRIES:
+                        raise
+            
+            # 限流或服务端错误：退避后重试
+            await asyncio.sleep(_backoff_delay(attempt, retry_after))
         
-        result = response.json()
+        result = orjson.loads(raw)
         
         if result.get("code") == 0 and result.get("value"):
+            if cache_path is not None and not cached:
+                _write_cache(cache_path, raw)
             value = result["value"]
             return {
                 "docId": value.get("docId"),
@@ -67,35 +228,76 @@ def fetch_document(object_id: str, catalog_name: str = "harmonyos-guides", langu
                 "content": value.get("content", {})
             }
         else:
-            print(f"[错误] 文档 {object_id}: {result.get('message', '未知错误')}")
+            logger.error("文档 %s: %s", object_id, result.get("message", "未知错误"))
             return None
             
-    except requests.exceptions.RequestException as e:
-        print(f"[错误] 请求失败 {object_id}: {str(e)}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("请求失败 %s: %s", object_id, e)
         return None
-    except json.JSONDecodeError:
-        print(f"[错误] JSON 解析失败 {object_id}")
+    except orjson.JSONDecodeError:
+        logger.error("JSON 解析失败 %s", object_id)
+        return None
+
+
+def _cache_path(cache_dir: str, object_id: str, catalog_name: str, language: str) -> Path:
+    """
+    计算文档响应的缓存路径（按请求参数的 SHA-1 分桶）
+    """
+    digest = hashlib.sha1(f"{catalog_name}/{language}/{object_id}".encode("utf-8")).hexdigest()
+    return Path(cache_dir) / digest[:2] / f"{digest}.json.zst"
+
+
+def _read_cache(cache_path: Path) -> Optional[bytes]:
+    """
+    读取缓存的原始响应，不存在或已损坏时返回 None
+    """
+    try:
+        return zstandard.ZstdDecompressor().decompress(cache_path.read_bytes())
+    except (OSError, zstandard.ZstdError):
         return None
 
 
-def fetch_and_save_documents(
+def _write_cache(cache_path: Path, raw: bytes) -> None:
+    """
+    压缩并写入原始响应，写入失败不影响爬取
+    """
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(zstandard.ZstdCompressor(level=CACHE_ZSTD_LEVEL).compress(raw))
+    except OSError as e:
+        logger.warning("写入缓存失败 %s: %s", cache_path, e)
+
+
+async def fetch_and_save_documents(
     category_file: str = "category.json",
     catalog_name: str = "harmonyos-guides",
-    output_file: str = "documents.json",
-    summary_file: str = "documents_summary.json",
+    output_file: str = "documents.jsonl",
+    summary_file: str = "documents_summary.jsonl",
     save_markdown: bool = True,
-    skip_existing: bool = True
+    skip_existing: bool = True,
+    legacy_json: bool = False,
+    cache_dir: Optional[str] = CACHE_DIR,
+    refresh_cache: bool = False
 ) -> Dict[str, any]:
     """
     从 category.json 爬取所有文档并实时保存
     
+    每个文档爬取完成后立即以 JSON Lines 格式追加到输出文件，
+    内存中只保留当前文档
+    
     Args:
         category_file: category.json 文件路径
         catalog_name: 目录名称，传递给 fetch_document
-        output_file: 完整文档输出文件
-        summary_file: 摘要输出文件
+        output_file: 完整文档输出文件（JSON Lines）
+        summary_file: 摘要输出文件（JSON Lines）
         save_markdown: 是否实时保存 Markdown 文件到 docs 目录
-        skip_existing: 是否跳过已下载的文档
+        skip_existing: 是否跳过已下载的文档（同时以追加模式写入输出文件，
+            已记录过的文档不会重复追加）
+        legacy_json: 是否额外生成旧版 JSON 数组格式的 documents.json /
+            documents_summary.json（需要将全部文档保留在内存中）
+        cache_dir: API 响应缓存目录，为 None 时不使用缓存
+        refresh_cache: 是否忽略已有缓存重新下载（仍会写入缓存）；
+            skip_existing 为 False 时总是重新下载
     
     Returns:
         包含爬取结果的字典
@@ -107,121 +309,146 @@ def fetch_and_save_documents(
     
     # 读取 category.json
     try:
-        with open(category_file, "r", encoding="utf-8") as f:
-            category_data = json.load(f)
+        with open(category_file, "rb") as f:
+            category_data = orjson.loads(f.read())
     except FileNotFoundError:
-        print(f"错误：找不到 {category_file} 文件")
+        logger.error("找不到 %s 文件", category_file)
         return {"success": False, "error": "File not found"}
-    except json.JSONDecodeError:
-        print(f"错误：{category_file} 文件格式不正确")
+    except orjson.JSONDecodeError:
+        logger.error("%s 文件格式不正确", category_file)
         return {"success": False, "error": "Invalid JSON"}
     
-    # 提取文档 ID
-    docs = _extract_doc_ids_with_path(category_data)
-    print(f"[提取] 找到 {len(docs)} 个文档")
+    # 统计文档数量
+    total_count = count_docs(category_data)
+    print(f"[提取] 找到 {total_count} 个文档")
     
-    # 创建 docs 目录
+    # 创建 docs 目录（目录可能在两次运行之间被删除，重置已创建记录）
+    _CREATED_DIRS.clear()
     if save_markdown:
         os.makedirs(DOCS_DIR, exist_ok=True)
         print(f"[创建] 输出目录: {os.path.abspath(DOCS_DIR)}")
     
-    # 检查已下载的文档
-    existing_files = set()
-    skipped_count = 0
-    if skip_existing and save_markdown and os.path.exists(DOCS_DIR):
-        print(f"[检查] 扫描已下载的文档...")
-        for doc in docs:
-            file_path = os.path.join(DOCS_DIR, doc["path"] + ".md")
-            if os.path.exists(file_path):
-                existing_files.add(doc["path"])
-        skipped_count = len(existing_files)
-        if skipped_count > 0:
-            print(f"[跳过] 发现 {skipped_count} 个已下载的文档，将跳过")
-        else:
-            print(f"[跳过] 未发现已下载的文档")
-    
-    print()
-    
     # 爬取文档
     documents = []
+    success_count = 0
     failed_count = 0
     saved_count = 0
+    skipped_count = 0
     
-    for i, doc in enumerate(docs, 1):
-        object_id = doc["relateDocument"]
-        node_name = doc["nodeName"]
-        doc_path = doc["path"]
-        
-        # 检查是否已下载
-        if skip_existing and doc_path in existing_files:
-            print(f"[{i}/{len(docs)}] 跳过: {node_name} (已存在)")
-            continue
-        
-        print(f"[{i}/{len(docs)}] 爬取: {node_name} ({object_id})", end=" ... ")
-        
-        doc_info = fetch_document(object_id, catalog_name=catalog_name)
-        if doc_info:
-            # 添加原始信息
-            doc_info.update({
-                "nodeName": node_name,
-                "relateDocument": doc["relateDocument"],
-                "nodeId": doc["nodeId"],
-                "path": doc["path"],
-                "isLeaf": doc["isLeaf"]
-            })
-            documents.append(doc_info)
-            print("✓", end="")
+    connector = aiohttp.TCPConnector(limit_per_host=CONNECTION_LIMIT_PER_HOST)
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = RateLimiter()
+    # 不跳过已下载文档时视为全量重新下载，不读取旧缓存
+    refresh = refresh_cache or not skip_existing
+    
+    # 断点续传时追加写入，保留之前已爬取的文档
+    mode = "ab" if skip_existing and save_markdown else "wb"
+    # 已写入输出文件的文档只重新生成 Markdown，不再重复追加记录
+    recorded = set()
+    if mode == "ab":
+        # 截掉上次中断留下的不完整行，避免新记录拼接到半行之后
+        _truncate_partial_line(output_file)
+        _truncate_partial_line(summary_file)
+        recorded = _load_recorded_ids(output_file)
+    
+    with open(output_file, mode) as out_f, open(summary_file, mode) as summary_f:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def fetch_one(doc: Dict):
+                doc_info = await fetch_document(
+                    session, sem, doc["relateDocument"],
+                    catalog_name=catalog_name, limiter=limiter,
+                    cache_dir=cache_dir, refresh=refresh
+                )
+                return doc, doc_info
             
-            # 实时保存 Markdown 文件
-            if save_markdown:
-                try:
-                    file_path = os.path.join(DOCS_DIR, doc["path"] + ".md")
-                    
-                    # 创建目录
-                    dir_path = os.path.dirname(file_path)
-                    if dir_path:
-                        os.makedirs(dir_path, exist_ok=True)
-                    
-                    # 构建 Markdown 内容
-                    markdown_content = f"""# {doc_info.get('title', 'Untitled')}
-
-**来源**: {node_name}  
-**文件名**: {doc_info.get('fileName', 'N/A')}
-
-"""
-                    
-                    # 添加锚点列表
-                    if doc_info.get("anchorList"):
-                        markdown_content += "## 目录\n\n"
-                        for anchor in doc_info["anchorList"]:
-                            markdown_content += f"- {anchor.get('title', 'Unknown')}\n"
-                        markdown_content += "\n"
+            # 跳过已下载的文档，其余提交爬取任务
+            tasks = []
+            for doc in iter_docs(category_data):
+                if skip_existing and save_markdown and _is_saved(
+                    os.path.join(DOCS_DIR, doc["path"] + ".md")
+                ):
+                    skipped_count += 1
+                    continue
+                tasks.append(asyncio.create_task(fetch_one(doc)))
+            
+            if skip_existing and save_markdown:
+                if skipped_count > 0:
+                    print(f"[跳过] 发现 {skipped_count} 个已下载的文档，将跳过")
+                else:
+                    print(f"[跳过] 未发现已下载的文档")
+            print()
+            
+            # 按完成顺序处理，响应到达即写入 Markdown
+            # 日志经 tqdm 输出，避免打断进度条
+            with logging_redirect_tqdm(), tqdm(total=len(tasks), unit="doc", desc="爬取") as pbar:
+                for future in asyncio.as_completed(tasks):
+                    doc, doc_info = await future
+                    node_name = doc["nodeName"]
                     
-                    # 转换 HTML 到 Markdown
-                    if doc_info.get("content") and doc_info["content"].get("content"):
-                        html_content = doc_info["content"]["content"]
-                        markdown_body = html_to_markdown(html_content)
-                        markdown_content += "## 内容\n\n"
-                        markdown_content += markdown_body
+                    if doc_info:
+                        # 添加原始信息
+                        doc_info.update({
+                            "nodeName": node_name,
+                            "relateDocument": doc["relateDocument"],
+                            "nodeId": doc["nodeId"],
+                            "path": doc["path"],
+                            "isLeaf": doc["isLeaf"]
+                        })
+                        if doc["relateDocument"] not in recorded:
+                            recorded.add(doc["relateDocument"])
+                            out_f.write(orjson.dumps(doc_info) + b"\n")
+                            out_f.flush()
+                            summary_f.write(orjson.dumps(_summarize(doc_info)) + b"\n")
+                            summary_f.flush()
+                        if legacy_json:
+                            documents.append(doc_info)
+                        success_count += 1
+                        
+                        # 实时保存 Markdown 文件
+                        if save_markdown:
+                            try:
+                                file_path = os.path.join(DOCS_DIR, doc["path"] + ".md")
+                                
+                                # 创建目录
+                                _ensure_dir(os.path.dirname(file_path))
+                                
+                                # 构建 Markdown 内容
+                                parts = [_HEADER_TPL.format_map({
+                                    "title": doc_info.get("title", "Untitled"),
+                                    "source": node_name,
+                                    "fname": doc_info.get("fileName", "N/A")
+                                })]
+                                
+                                # 添加锚点列表
+                                if doc_info.get("anchorList"):
+                                    parts.append("## 目录\n\n")
+                                    for anchor in doc_info["anchorList"]:
+                                        parts.append(f"- {anchor.get('title', 'Unknown')}\n")
+                                    parts.append("\n")
+                                
+                                # 转换 HTML 到 Markdown
+                                if doc_info.get("content") and doc_info["content"].get("content"):
+                                    html_content = doc_info["content"]["content"]
+                                    parts.append("## 内容\n\n")
+                                    parts.append(html_to_markdown(html_content))
+                                
+                                markdown_content = "".join(parts)
+                                
+                                # 写入文件
+                                with open(file_path, "w", encoding="utf-8") as f:
+                                    f.write(markdown_content)
+                                saved_count += 1
+                            except Exception as e:
+                                logger.error("保存失败 %s: %s", node_name, e)
+                    else:
+                        failed_count += 1
                     
-                    # 写入文件
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(markdown_content)
-                    saved_count += 1
-                    print(" [已保存]")
-                except Exception as e:
-                    print(f" [保存失败: {str(e)}]")
-            else:
-                print()
-        else:
-            failed_count += 1
-            print("✗")
-        
-        # 延迟请求
-        time.sleep(REQUEST_DELAY)
+                    # 先更新计数再推进进度条，使本次刷新显示最新计数
+                    pbar.set_postfix(ok=success_count, fail=failed_count, skip=skipped_count, refresh=False)
+                    pbar.update(1)
     
     print()
-    print(f"[完成] 成功爬取 {len(documents)}/{len(docs)} 个文档")
+    print(f"[完成] 成功爬取 {success_count}/{total_count} 个文档")
     if save_markdown:
         print(f"[完成] 成功保存 {saved_count} 个 Markdown 文件")
     if skipped_count > 0:
@@ -230,104 +457,206 @@ def fetch_and_save_documents(
         print(f"[失败] {failed_count} 个文档爬取失败")
     print()
     
-    # 保存完整文档
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(documents, f, ensure_ascii=False, indent=2)
     print(f"[保存] 完整数据已保存到 {output_file}")
-    
-    # 生成摘要
-    summary = []
-    for doc in documents:
-        summary.append({
-            "nodeName": doc.get("nodeName"),
-            "title": doc.get("title"),
-            "fileName": doc.get("fileName"),
-            "path": doc.get("path"),
-            "anchorCount": len(doc.get("anchorList", [])),
-            "anchors": [a.get("title") for a in doc.get("anchorList", [])]
-        })
-    
-    with open(summary_file, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
     print(f"[保存] 摘要已保存到 {summary_file}")
     
+    # 旧版 JSON 数组格式
+    if legacy_json:
+        legacy_output_file = os.path.splitext(output_file)[0] + ".json"
+        save_json(legacy_output_file, documents)
+        print(f"[保存] 完整数据已保存到 {legacy_output_file}")
+        
+        summary = [_summarize(doc) for doc in documents]
+        legacy_summary_file = os.path.splitext(summary_file)[0] + ".json"
+        save_json(legacy_summary_file, summary)
+        print(f"[保存] 摘要已保存到 {legacy_summary_file}")
+    
     return {
         "success": True,
-        "total": len(docs),
-        "successful": len(documents),
+        "total": total_count,
+        "successful": success_count,
         "failed": failed_count,
         "saved": saved_count,
-        "skipped": skipped_count,
-        "documents": documents
+        "skipped": skipped_count
     }
 
 
-def _extract_doc_ids_with_path(data: List[Dict], path: str = "") -> List[Dict]:
+def _ensure_dir(dir_path: str) -> None:
     """
-    从 category.json 递归提取所有文档信息，包含路径信息
-    返回包含 nodeName, relateDocument, path 的列表
+    创建目录（如不存在），同一目录只调用一次 os.makedirs
     """
-    docs = []
+    if dir_path and dir_path not in _CREATED_DIRS:
+        os.makedirs(dir_path, exist_ok=True)
+        _CREATED_DIRS.add(dir_path)
+
+
+def _is_saved(file_path: str) -> bool:
+    """
+    判断 Markdown 文件是否已保存（存在且非空），只做一次 stat
+    """
+    try:
+        return os.stat(file_path).st_size > 0
+    except OSError:
+        return False
+
+
+def _truncate_partial_line(file_path: str) -> None:
+    """
+    将 JSON Lines 文件截断到最后一个换行符，去掉末尾不完整的行
     
-    def traverse(nodes, current_path):
-        for node in nodes:
-            node_name = node.get("nodeName", "")
-            relate_doc = node.get("relateDocument", "")
-            
-            # 构建路径
-            if current_path:
-                node_path = f"{current_path}/{_sanitize_filename(node_name)}"
-            else:
-                node_path = _sanitize_filename(node_name)
-            
-            # 添加文档信息
-            if node_name and relate_doc:
-                docs.append({
-                    "nodeName": node_name,
-                    "relateDocument": relate_doc,
-                    "relateDocId": node.get("relateDocId", ""),
-                    "nodeId": node.get("nodeId", ""),
-                    "path": node_path,
-                    "isLeaf": node.get("isLeaf", True)
-                })
-            
-            # 递归处理子节点
-            children = node.get("children", [])
-            if children:
-                traverse(children, node_path if node_name else current_path)
+    Args:
+        file_path: JSON Lines 文件路径，不存在时忽略
+    """
+    try:
+        with open(file_path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            # 从文件末尾向前分块查找最后一个换行符
+            while pos > 0:
+                step = min(pos, 65536)
+                pos -= step
+                f.seek(pos)
+                index = f.read(step).rfind(b"\n")
+                if index != -1:
+                    pos += index + 1
+                    break
+            if pos < end:
+                f.truncate(pos)
+    except FileNotFoundError:
+        pass
+
+
+def _load_recorded_ids(output_file: str) -> set[str]:
+    """
+    读取已有 JSON Lines 输出中记录过的 relateDocument，断点续传时避免重复追加
     
-    traverse(data, path)
-    return docs
+    Args:
+        output_file: 完整文档输出文件（JSON Lines）
+    
+    Returns:
+        已记录文档的 relateDocument 集合，文件不存在时返回空集合
+    """
+    recorded = set()
+    try:
+        with open(output_file, "rb") as f:
+            for line in f:
+                try:
+                    doc = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # 上次中断时可能留下不完整的行
+                    continue
+                if isinstance(doc, dict) and doc.get("relateDocument"):
+                    recorded.add(doc["relateDocument"])
+    except FileNotFoundError:
+        pass
+    return recorded
+
+
+def _summarize(doc: Dict) -> Dict:
+    """
+    生成单个文档的摘要信息
+    """
+    anchors = doc.get("anchorList") or []
+    return {
+        "nodeName": doc.get("nodeName"),
+        "title": doc.get("title"),
+        "fileName": doc.get("fileName"),
+        "path": doc.get("path"),
+        "anchorCount": len(anchors),
+        "anchors": [a.get("title") for a in anchors]
+    }
+
+
+def iter_docs(data: List[Dict], path: str = "") -> Iterator[Dict]:
+    """
+    从 category.json 逐个产出文档信息，包含路径信息
+    只产出同时具有 nodeName 和 relateDocument 的节点；
+    使用显式栈按先序遍历，避免深层目录树触发递归深度限制
+    产出包含 nodeName, relateDocument, path, isLeaf 的字典
+    """
+    stack = [(node, path) for node in reversed(data)]
+    
+    while stack:
+        node, current_path = stack.pop()
+        node_name = node.get("nodeName", "")
+        relate_doc = node.get("relateDocument", "")
+        
+        # 构建路径
+        if current_path:
+            node_path = f"{current_path}/{_sanitize_filename(node_name)}"
+        else:
+            node_path = _sanitize_filename(node_name)
+        
+        # 产出文档信息
+        if node_name and relate_doc:
+            yield {
+                "nodeName": node_name,
+                "relateDocument": relate_doc,
+                "relateDocId": node.get("relateDocId", ""),
+                "nodeId": node.get("nodeId", ""),
+                "path": node_path,
+                "isLeaf": node.get("isLeaf", True)
+            }
+        
+        # 子节点逆序入栈，保证按原顺序处理
+        child_path = node_path if node_name else current_path
+        for child in reversed(node.get("children") or ()):
+            stack.append((child, child_path))
 
 
+def count_docs(data: List[Dict]) -> int:
+    """
+    统计 iter_docs 将产出的文档数量（不构建路径）
+    """
+    count = 0
+    stack = list(data)
+    while stack:
+        node = stack.pop()
+        if node.get("nodeName") and node.get("relateDocument"):
+            count += 1
+        stack.extend(node.get("children") or ())
+    return count
+
+
+@lru_cache(maxsize=4096)
 def _sanitize_filename(filename: str) -> str:
     """
     清理文件名，移除特殊字符
     """
     # 移除特殊字符，保留中文、英文、数字、下划线、连字符
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    filename = re.sub(r'\s+', '_', filename)
+    filename = _BAD_CHARS_RE.sub('', filename)
+    filename = _WS_RE.sub('_', filename)
     return filename.strip()
 
 
 if __name__ == "__main__":
-    # 完整流程：边爬取边保存，支持断点续传
+    logging.basicConfig(
+        level=os.environ.get("LOGLEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    
+    # REFRESH=1 时忽略已下载的文档和响应缓存，全量重新下载（用于获取上游更新）
+    refresh = os.environ.get("REFRESH", "") not in ("", "0")
+    
+    # 完整流程：并发爬取、边爬取边保存，支持断点续传
     print("\n" + "=" * 80)
     print("OpenHarmony 文档爬虫 - 边爬取边保存（支持断点续传）")
     print("=" * 80)
     print()
     
-    result = fetch_and_save_documents(
+    result = asyncio.run(fetch_and_save_documents(
         category_file="category.json",
         catalog_name="harmonyos-guides",
-        output_file="documents.json",
-        summary_file="documents_summary.json",
+        output_file="documents.jsonl",
+        summary_file="documents_summary.jsonl",
         save_markdown=True,  # 实时保存 Markdown
-        skip_existing=True   # 跳过已下载的文档
-    )
+        skip_existing=not refresh,  # 跳过已下载的文档
+        legacy_json=False,   # 不生成旧版 documents.json
+        refresh_cache=refresh
+    ))
     
     if not result.get("success"):
-        print("\n[错误] 文档爬取失败")
+        logger.error("文档爬取失败")
         sys.exit(1)
     
     print()
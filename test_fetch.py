@@ -5,21 +5,51 @@
 测试脚本 - 只爬取前 3 个文档
 """
 
-import json
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import os
 import re
+from functools import lru_cache
 from html_to_markdown import html_to_markdown
 
+logger = logging.getLogger(__name__)
+
 # API 配置
 API_URL = "https://svc-drcn.developer.huawei.com/community/servlet/consumer/cn/documentPortal/getDocumentById"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
 
+# 复用连接的会话（keep-alive），失败时自动重试
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["POST"]  # 查询接口，POST 可安全重试
+    )
+))
+
 DOCS_DIR = "docs"
 
+# Markdown 文件头模板
+_HEADER_TPL = "# {title}\n\n**来源**: {source}  \n**文件名**: {fname}\n\n"
+
+# 已创建的目录，避免重复调用 os.makedirs
+_CREATED_DIRS = set()
+
+# 文件名清理规则
+_BAD_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_WS_RE = re.compile(r'\s+')
+
 def fetch_document(object_id, catalog_name="harmonyos-guides", language="cn"):
     """获取单个文档"""
     try:
@@ -29,10 +59,11 @@ def fetch_document(object_id, catalog_name="harmonyos-guides", language="cn"):
             "catalogName": catalog_name,
             "language": language
         }
-        response = requests.post(API_URL, json=payload, headers=HEADERS, timeout=10)
+        response = SESSION.post(API_URL, json=payload, timeout=10)
         response.raise_for_status()
         
-        result = response.json()
+        # 直接解析原始字节，省去一次解码
+        result = orjson.loads(response.content)
         
         if result.get("code") == 0 and result.get("value"):
             value = result["value"]
@@ -44,18 +75,25 @@ def fetch_document(object_id, catalog_name="harmonyos-guides", language="cn"):
                 "content": value.get("content", {})
             }
         else:
-            print(f"[错误] {object_id}: {result.get('message', '未知错误')}")
+            logger.error("%s: %s", object_id, result.get("message", "未知错误"))
             return None
     except Exception as e:
-        print(f"[错误] 请求失败 {object_id}: {str(e)}")
+        logger.error("请求失败 %s: %s", object_id, e)
         return None
 
+@lru_cache(maxsize=4096)
 def sanitize_filename(filename):
     """清理文件名"""
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    filename = re.sub(r'\s+', '_', filename)
+    filename = _BAD_CHARS_RE.sub('', filename)
+    filename = _WS_RE.sub('_', filename)
     return filename.strip()
 
+def ensure_dir(dir_path):
+    """创建目录（同一目录只创建一次）"""
+    if dir_path and dir_path not in _CREATED_DIRS:
+        os.makedirs(dir_path, exist_ok=True)
+        _CREATED_DIRS.add(dir_path)
+
 def main():
     print("测试：爬取前 3 个文档并保存")
     print("=" * 80)
@@ -82,31 +120,29 @@ def main():
             file_path = os.path.join(DOCS_DIR, sanitize_filename(doc["path"]) + ".md")
             
             # 创建目录
-            dir_path = os.path.dirname(file_path)
-            if dir_path:
-                os.makedirs(dir_path, exist_ok=True)
+            ensure_dir(os.path.dirname(file_path))
             
             # 构建 Markdown 内容
-            markdown_content = f"""# {doc_info.get('title', 'Untitled')}
-
-**来源**: {doc['nodeName']}  
-**文件名**: {doc_info.get('fileName', 'N/A')}
-
-"""
+            parts = [_HEADER_TPL.format_map({
+                "title": doc_info.get("title", "Untitled"),
+                "source": doc["nodeName"],
+                "fname": doc_info.get("fileName", "N/A")
+            })]
             
             # 添加锚点列表
             if doc_info.get("anchorList"):
-                markdown_content += "## 目录\n\n"
+                parts.append("## 目录\n\n")
                 for anchor in doc_info["anchorList"]:
-                    markdown_content += f"- {anchor.get('title', 'Unknown')}\n"
-                markdown_content += "\n"
+                    parts.append(f"- {anchor.get('title', 'Unknown')}\n")
+                parts.append("\n")
             
             # 转换 HTML 到 Markdown
             if doc_info.get("content") and doc_info["content"].get("content"):
                 html_content = doc_info["content"]["content"]
-                markdown_body = html_to_markdown(html_content)
-                markdown_content += "## 内容\n\n"
-                markdown_content += markdown_body
+                parts.append("## 内容\n\n")
+                parts.append(html_to_markdown(html_content))
+            
+            markdown_content = "".join(parts)
             
             # 保存文件
             try:
@@ -114,16 +150,22 @@ def main():
                     f.write(markdown_content)
                 print(f"  ✓ 保存成功: {file_path}")
             except Exception as e:
-                print(f"  ✗ 保存失败: {str(e)}")
+                logger.error("保存失败 %s: %s", file_path, e)
         else:
-            print(f"  ✗ 爬取失败")
+            logger.error("爬取失败 %s", doc["relateDocument"])
         
         time.sleep(0.5)
         print()
     
+    SESSION.close()
+    
     print("=" * 80)
     print("测试完成！请检查 docs 目录")
     print("=" * 80)
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.environ.get("LOGLEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
     main()
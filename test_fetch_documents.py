@@ -0,0 +1,44 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import fetch_documents
+import main
+from main import MAX_RETRIES, RateLimiter
+
+
+class _TooManyRequestsHandler(BaseHTTPRequestHandler):
+    hits = 0
+    
+    def do_POST(self):
+        type(self).hits += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(429)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttling_server(monkeypatch):
+    _TooManyRequestsHandler.hits = 0
+    server = HTTPServer(("127.0.0.1", 0), _TooManyRequestsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(fetch_documents, "API_URL", f"http://127.0.0.1:{server.server_port}/api")
+    monkeypatch.setattr(main, "RETRY_BACKOFF_BASE", 0.01)
+    yield _TooManyRequestsHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_429_slows_limiter(throttling_server):
+    limiter = RateLimiter(rate_per_sec=100)
+    
+    assert fetch_documents.fetch_document("doc", limiter=limiter) is None
+    assert throttling_server.hits == MAX_RETRIES + 1
+    # 每次 429 速率减半
+    assert limiter.rate_per_sec == pytest.approx(100 / 2 ** (MAX_RETRIES + 1))
@@ -0,0 +1,80 @@
+import pytest
+
+import html_to_markdown
+from html_to_markdown import html_to_markdown as convert
+
+
+@pytest.mark.parametrize("html, expected", [
+    # 列表
+    ("<ul><li>a</li><li>b<ul><li>c</li></ul></li></ul>", "- a\n- b\n  - c"),
+    ('<ol start="3"><li>x</li><li>y</li></ol>', "3. x\n4. y"),
+    # 表格
+    (
+        "<table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>a|b</td></tr></table>",
+        "| A | B |\n| --- | --- |\n| 1 | a\\|b |"
+    ),
+    # 代码块
+    (
+        '<pre><code class="language-ts">let a = 1;\nlet b = 2;</code></pre>',
+        "```ts\nlet a = 1;\nlet b = 2;\n```"
+    ),
+    ("<pre>line1<br>line2</pre>", "```\nline1\nline2\n```"),
+    ("<pre><code>a<br/><span>b</span></code></pre>", "```\na\nb\n```"),
+    # 链接（页内锚点只保留文本）
+    ('<p><a href="http://x.com/a">link</a> and <a href="#sec">anchor</a></p>', "[link](http://x.com/a) and anchor"),
+    # 实体
+    ("<p>a &amp; b &lt;c&gt;</p>", "a & b <c>"),
+    # 强调与行内代码
+    ("<p><strong>bold</strong> <em>it</em> <code>x</code></p>", "**bold** _it_ `x`"),
+    ("<h2>Title</h2><p>text</p>", "## Title\n\ntext"),
+    # 行首的块级标记需要转义
+    ("<p>1. not list</p>", "1\\. not list"),
+    ("<p>- a</p><p>+ b</p><p>* c</p>", "\\- a\n\n\\+ b\n\n\\* c"),
+    ("<p>&gt; quote</p><p># title</p><p>---</p>", "\\> quote\n\n\\# title\n\n\\---"),
+    ("<p>a<br>- b<br>3) c</p>", "a  \n\\- b  \n3\\) c"),
+    ("<ul><li>- x</li></ul>", "- \\- x"),
+    ("<p>#tag -x 1.5 <b>bold</b></p>", "#tag -x 1.5 **bold**"),
+])
+def test_convert(html, expected):
+    assert convert(html) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", ""),
+    ("  \n ", ""),
+    ("plain  text\nhere", "plain text here"),
+    ("1. plain", "1\\. plain"),
+])
+def test_plain_text_skips_parser(monkeypatch, text, expected):
+    def fail(html):
+        raise AssertionError("纯文本不应进入解析器")
+    
+    monkeypatch.setattr(html_to_markdown, "html_to_markdown_fast", fail)
+    assert convert(text) == expected
+
+
+def test_entities_are_parsed():
+    assert convert("a &amp; b") == "a & b"
+
+
+def test_fallback_to_html2text(monkeypatch):
+    def fail(html):
+        raise ValueError("boom")
+    
+    monkeypatch.setattr(html_to_markdown, "html_to_markdown_fast", fail)
+    assert convert("<p>Hello <b>bold</b></p>\n\n\n\n<p>end</p>") == "Hello **bold**\n\nend"
+
+
+def test_returns_raw_html_when_all_converters_fail(monkeypatch):
+    def fail(*args):
+        raise ValueError("boom")
+    
+    monkeypatch.setattr(html_to_markdown, "html_to_markdown_fast", fail)
+    monkeypatch.setattr(html_to_markdown, "_new_converter", fail)
+    assert convert("<p>x</p>") == "<p>x</p>"
+
+
+def test_load_documents_skips_malformed_lines(tmp_path):
+    path = tmp_path / "documents.jsonl"
+    path.write_bytes(b'{"title": "a"}\n{"title": "b\n\n{"title": "c"}\n')
+    assert html_to_markdown.load_documents(str(path)) == [{"title": "a"}, {"title": "c"}]
@@ -0,0 +1,152 @@
+import asyncio
+import shutil
+import time
+
+import orjson
+
+import main
+from html_to_markdown import load_documents
+from main import RateLimiter
+
+
+def _run_waiters(limiter: RateLimiter, count: int, throttle):
+    """
+    启动 count 个排队等待时间槽的协程，在它们等待期间调用 throttle(limiter)，
+    返回 (限流时刻, 各请求发出时刻列表)
+    """
+    async def run():
+        sent = []
+        
+        async def worker():
+            await limiter.await_slot()
+            sent.append(time.monotonic())
+        
+        tasks = [asyncio.create_task(worker()) for _ in range(count)]
+        await asyncio.sleep(0.05)
+        throttled_at = time.monotonic()
+        throttle(limiter)
+        await asyncio.gather(*tasks)
+        return throttled_at, sent
+    
+    return asyncio.run(run())
+
+
+def test_retry_after_delays_waiting_requests():
+    throttled_at, sent = _run_waiters(
+        RateLimiter(rate_per_sec=100), 30,
+        lambda limiter: limiter.update(429, {"Retry-After": "0.3"})
+    )
+    
+    assert any(t < throttled_at for t in sent)
+    # Retry-After 窗口内不应再有排队中的请求发出
+    assert not [t for t in sent if throttled_at < t < throttled_at + 0.29]
+
+
+def test_rate_limit_slows_waiting_requests():
+    throttled_at, sent = _run_waiters(
+        RateLimiter(rate_per_sec=100), 20,
+        lambda limiter: limiter.update(429, {"X-RateLimit-Remaining": "0"})
+    )
+    
+    after = sorted(t for t in sent if t > throttled_at)
+    assert len(after) > 2
+    # 降速到 50 次/秒后，排队中的请求间隔不少于 1/50 秒
+    gaps = [b - a for a, b in zip(after, after[1:])]
+    assert min(gaps) >= 1 / 50 - 0.002
+
+
+_CATEGORY = [
+    {"nodeName": f"doc{i}", "relateDocument": f"d{i}", "nodeId": f"n{i}", "isLeaf": True, "children": []}
+    for i in range(3)
+]
+
+
+async def _fake_fetch_document(session, sem, object_id, **kwargs):
+    return {
+        "docId": object_id,
+        "title": object_id,
+        "fileName": object_id,
+        "anchorList": [],
+        "content": {"content": f"<p>{object_id}</p>"}
+    }
+
+
+def _crawl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "fetch_document", _fake_fetch_document)
+    (tmp_path / "category.json").write_bytes(orjson.dumps(_CATEGORY))
+    return asyncio.run(main.fetch_and_save_documents(cache_dir=None))
+
+
+def _recorded(path, key):
+    return sorted(doc[key] for doc in load_documents(str(path)))
+
+
+def test_resume_does_not_duplicate_records(tmp_path, monkeypatch):
+    _crawl(tmp_path, monkeypatch)
+    
+    # 删除 docs/ 后重新运行：重新生成 Markdown，但不重复追加记录
+    shutil.rmtree(tmp_path / "docs")
+    result = _crawl(tmp_path, monkeypatch)
+    
+    assert result["saved"] == 3
+    assert _recorded(tmp_path / "documents.jsonl", "relateDocument") == ["d0", "d1", "d2"]
+    assert _recorded(tmp_path / "documents_summary.jsonl", "nodeName") == ["doc0", "doc1", "doc2"]
+
+
+def test_resume_drops_partial_last_line(tmp_path, monkeypatch):
+    _crawl(tmp_path, monkeypatch)
+    
+    # 模拟上次写入 d2 时中断：最后一行只写了一半，Markdown 未保存
+    for name in ("documents.jsonl", "documents_summary.jsonl"):
+        path = tmp_path / name
+        lines = path.read_bytes().splitlines(keepends=True)
+        kept = [line for line in lines if b'"doc2"' not in line]
+        torn = next(line for line in lines if line not in kept)
+        path.write_bytes(b"".join(kept) + torn[:len(torn) // 2])
+    (tmp_path / "docs" / "doc2.md").unlink()
+    
+    _crawl(tmp_path, monkeypatch)
+    
+    assert _recorded(tmp_path / "documents.jsonl", "relateDocument") == ["d0", "d1", "d2"]
+    for name in ("documents.jsonl", "documents_summary.jsonl"):
+        lines = (tmp_path / name).read_bytes().splitlines()
+        assert len(lines) == 3
+        assert all(orjson.loads(line) for line in lines)
+
+
+def test_refresh_bypasses_cache(tmp_path, monkeypatch):
+    from aiohttp import web
+    
+    hits = []
+    
+    async def handler(request):
+        hits.append(await request.json())
+        return web.json_response({"code": 0, "value": {"title": f"v{len(hits)}"}})
+    
+    async def run():
+        app = web.Application()
+        app.router.add_post("/api", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        monkeypatch.setattr(main, "API_URL", f"http://127.0.0.1:{port}/api")
+        
+        sem = asyncio.Semaphore(1)
+        titles = []
+        try:
+            async with main.aiohttp.ClientSession() as session:
+                for refresh in (False, False, True, False):
+                    doc = await main.fetch_document(
+                        session, sem, "d0", cache_dir=str(tmp_path), refresh=refresh
+                    )
+                    titles.append(doc["title"])
+        finally:
+            await runner.cleanup()
+        return titles
+    
+    # 第二次命中缓存；refresh 重新请求并覆盖缓存，之后读取到新内容
+    assert asyncio.run(run()) == ["v1", "v1", "v2", "v2"]
+    assert len(hits) == 2